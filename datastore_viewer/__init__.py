@@ -1,5 +1,6 @@
 import os
 import flask
+import jinja2
 import logging
 import sys
 
@@ -29,6 +30,18 @@ class DatastoreViewer:
         app = flask.Flask(__name__)
         app.config['JSON_AS_ASCII'] = False
 
+        from datastore_viewer.presentation.json_provider import get_json_encoder_class
+        from datastore_viewer.presentation.json_provider import get_json_provider_class
+
+        json_provider_class = get_json_provider_class()
+        if json_provider_class is not None:
+            app.json = json_provider_class(app)
+        else:
+            app.json_encoder = get_json_encoder_class()
+
+        # keep compiled templates across worker restarts; auto_reload still follows debug mode
+        app.jinja_env.bytecode_cache = jinja2.FileSystemBytecodeCache()
+
         return app
 
     def flask_blueprints(self):
@@ -40,6 +53,11 @@ class DatastoreViewer:
         for blueprint in self.flask_blueprints():
             self._app.register_blueprint(blueprint=blueprint)
 
+        try:
+            self._app.jinja_env.get_template('datastore_viewer/index.html')
+        except jinja2.TemplateNotFound:
+            logger.warning('datastore_viewer/index.html is not found, the webapp may not be built yet.')
+
         @self._app.route('/')
         def root():
             return flask.redirect('/datastore_viewer/')
@@ -70,7 +88,7 @@ class DatastoreViewer:
             port: Optional[str] = None,
             debug: Optional[bool] = None,
     ):
-        logger.info(f'DatastoreViewer execute with DATASTORE_EMULATOR_HOST = {self._emulator_host}')
+        logger.info('DatastoreViewer execute with DATASTORE_EMULATOR_HOST = %s', self._emulator_host)
         return self._app.run(
             host=host,
             port=port,
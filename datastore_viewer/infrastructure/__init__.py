@@ -1,7 +1,6 @@
-import base64
-import json
 import os
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 from typing import Optional
 from logging import getLogger
@@ -10,9 +9,13 @@ from typing import Tuple
 import google.auth
 import requests
 from google.cloud import datastore
+from google.protobuf.message import DecodeError
 
 logger = getLogger(__name__)
 
+# shared by all repositories to overlap independent Datastore round-trips without spawning threads per request
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='datastore-viewer')
+
 
 class EmulatorCreds(google.auth.credentials.Credentials):
     def __init__(self):
@@ -63,8 +66,16 @@ class DatastoreViewerRepository:
     def datastore_client(self) -> datastore.Client:
         return self._datastore_client
 
-    def build_key_by_flat_path(self, key_path):
-        return self.datastore_client.key(*key_path)
+    def build_key_by_url_safe_key(self, url_safe_key: str) -> datastore.Key:
+        try:
+            key = datastore.Key.from_legacy_urlsafe(url_safe_key)
+        except DecodeError as e:
+            raise ValueError(f'invalid url safe key "{url_safe_key}"') from e
+
+        # the token carries its own project, which must be the one this repository serves
+        if key.project != self._project_name:
+            raise ValueError(f'key project "{key.project}" does not match "{self._project_name}"')
+        return key
 
     def fetch_project_name(self):
         return self.datastore_client.project
@@ -109,10 +120,13 @@ class DatastoreViewerRepository:
     def fetch_parent_properties(self):
         properties_by_kind = {}
 
-        for kind in self.fetch_kinds():
+        kinds_future = _executor.submit(self.fetch_kinds)
+        properties = self.fetch_properties()
+
+        for kind in kinds_future.result():
             properties_by_kind[kind] = []
 
-        for kind, props in self.fetch_properties().items():
+        for kind, props in properties.items():
             result = []
             for prop in props:
                 if prop.find('.') >= 0:
@@ -123,37 +137,60 @@ class DatastoreViewerRepository:
 
         return properties_by_kind
 
-    def fetch_entities(self, kind: str, per_page: int = 25, page_number: int = 1, orderBy: str = "") -> Tuple[List[datastore.Entity], int]:
-        offset = per_page * (page_number - 1)
+    def fetch_entities(
+            self,
+            kind: str,
+            per_page: int = 25,
+            page_number: int = 1,
+            orderBy: str = "",
+            cursor: Optional[str] = None,
+    ) -> Tuple[List[datastore.Entity], int, Optional[bytes]]:
+        """fetch a page of entities
+        When a cursor is given it is passed through to the query as-is (it is already
+        the URL-safe encoding the client library expects) and page_number is ignored.
+        :return: entities, total count and the cursor of the next page
+        """
         query: datastore.Query = self.datastore_client.query(kind=kind)
+        count_query: datastore.Query = self.datastore_client.query(kind=kind)
+        count_query.keys_only()
 
         if orderBy != "":
             query.order = orderBy
+            count_query.order = orderBy
+
+        if cursor is not None:
+            query_iter = query.fetch(limit=per_page, start_cursor=cursor)
+        else:
+            offset = per_page * (page_number - 1)
+            query_iter = query.fetch(limit=per_page, offset=offset)
+
+        # the keys-only count query is independent of the page, so run it while the page is fetched
+        count_future = _executor.submit(lambda: len(list(count_query.fetch())))
 
         entities = []
-        for entity in query.fetch(limit=per_page, offset=offset):
-            entity._serialized_key = base64.b64encode(json.dumps(entity.key.flat_path).encode('utf-8')).decode('utf-8')
+        for entity in query_iter:
+            entity._serialized_key = entity.key.to_legacy_urlsafe().decode('utf-8')
             entities.append(entity)
+        next_cursor = query_iter.next_page_token
 
-        query.keys_only()
-        total_count = len(list(query.fetch()))
+        total_count = count_future.result()
 
-        return entities, total_count
+        return entities, total_count, next_cursor
 
     def fetch_entity(self, key: datastore.Key):
         entity = self.datastore_client.get(key)
-        entity._serialized_key = base64.b64encode(json.dumps(entity.key.flat_path).encode('utf-8')).decode('utf-8')
+        entity._serialized_key = entity.key.to_legacy_urlsafe().decode('utf-8')
         return entity
 
     def delete(self, key: datastore.Key):
         self.datastore_client.delete(key=key)
-        logger.info(f'key = {key} is deleted.')
+        logger.info('key = %s is deleted.', key)
 
     def delete_multi(self, keys: List[datastore.Key]):
         entity = self.datastore_client.get(keys[0])
         kind = entity.kind
         self.datastore_client.delete_multi(keys)
-        logger.info(f'kind={kind} keys ({len(keys)} items) deleted.')
+        logger.info('kind=%s keys (%d items) deleted.', kind, len(keys))
 
     def delete_all(self, kind: str):
         query = self.datastore_client.query(kind=kind)
@@ -165,4 +202,4 @@ class DatastoreViewerRepository:
             if len(keys) == 0:
                 break
             self.datastore_client.delete_multi(keys)
-            logger.info(f'kind={kind} keys ({len(keys)} items) deleted.')
+            logger.info('kind=%s keys (%d items) deleted.', kind, len(keys))
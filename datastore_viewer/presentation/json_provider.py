@@ -0,0 +1,81 @@
+import datetime
+
+import flask
+
+
+def _timestamp_to_json(o: datetime.datetime) -> str:
+    # RFC 3339 for every datetime, including Datastore's DatetimeWithNanoseconds subclass
+    if o.tzinfo is None:
+        o = o.replace(tzinfo=datetime.timezone.utc)
+    return o.isoformat()
+
+
+def get_json_encoder_class():
+    """JSON encoder for Flask < 2.2, which has no JSON provider API
+    :return:
+    """
+    class RFC3339JSONEncoder(flask.json.JSONEncoder):
+        def default(self, o):
+            if isinstance(o, datetime.datetime):
+                return _timestamp_to_json(o)
+
+            return super().default(o)
+
+    return RFC3339JSONEncoder
+
+
+def get_json_provider_class():
+    """JSON provider emitting timestamps as RFC 3339
+    Backed by orjson when it is installed; the output is the same either way.
+    Returns None when Flask has no JSON provider API (< 2.2), use get_json_encoder_class() instead.
+    :return:
+    """
+    try:
+        from flask.json.provider import DefaultJSONProvider
+    except ImportError:
+        return None
+
+    class RFC3339JSONProvider(DefaultJSONProvider):
+        ensure_ascii = False
+
+        @staticmethod
+        def default(o):
+            if isinstance(o, datetime.datetime):
+                return _timestamp_to_json(o)
+
+            return DefaultJSONProvider.default(o)
+
+    try:
+        import orjson
+    except ImportError:
+        return RFC3339JSONProvider
+
+    class OrjsonProvider(RFC3339JSONProvider):
+        def dumps(self, obj, **kwargs):
+            sort_keys = kwargs.get('sort_keys', self.sort_keys)
+            indent = kwargs.get('indent')
+
+            # orjson output is compact (or 2-space indented) and never ascii-escaped;
+            # anything else goes through the stdlib encoder so the result is the same
+            if (
+                set(kwargs) - {'sort_keys', 'indent', 'separators', 'ensure_ascii'}
+                or kwargs.get('ensure_ascii', self.ensure_ascii)
+                or indent not in (None, 2)
+                or kwargs.get('separators') not in (None, (',', ':'))
+            ):
+                return super().dumps(obj, **kwargs)
+
+            option = orjson.OPT_NAIVE_UTC
+            if sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            if indent is not None:
+                option |= orjson.OPT_INDENT_2
+
+            return orjson.dumps(obj, default=self.default, option=option).decode('utf-8')
+
+        def loads(self, s, **kwargs):
+            if kwargs:
+                return super().loads(s, **kwargs)
+            return orjson.loads(s)
+
+    return OrjsonProvider
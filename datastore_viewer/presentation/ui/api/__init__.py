@@ -1,28 +1,84 @@
 import base64
+import binascii
 import datetime
+import functools
 import json
 import os
+import threading
+import time
 import uuid
-from collections import defaultdict
+from typing import FrozenSet
+from typing import Optional
 
+import cachetools
 import flask.views
 
 from datastore_viewer.infrastructure import DatastoreViewerRepository
 from datastore_viewer.infrastructure import get_client
 from datastore_viewer.presentation.ui.api.encoder import DataStoreEntityJSONEncoder
 
+_DEFAULT_PROJECT = os.environ.get('GOOGLE_CLOUD_PROJECT', '')
+
+_PROJECT_LIST_JSON = {
+    "projectResult": {
+        "project_name": _DEFAULT_PROJECT
+    }
+}
+
+
+@functools.lru_cache(maxsize=64)
+def _cached_repository(project_name: str, namespace: Optional[str]) -> DatastoreViewerRepository:
+    # Reuse the underlying datastore client (and its channel/auth setup) across requests.
+    return DatastoreViewerRepository(project_name=project_name, namespace=namespace)
+
+
+def _get_repository(project_name: str, namespace: Optional[str] = None) -> DatastoreViewerRepository:
+    # lru_cache keys on how arguments are passed, so always call it positionally
+    return _cached_repository(project_name, namespace)
+
+
+_parent_properties_cache = cachetools.TTLCache(maxsize=32, ttl=60)
+_parent_properties_lock = threading.Lock()
+
+
+# keyed on the bare project name so positional and keyword calls share one entry
+@cachetools.cached(cache=_parent_properties_cache, key=lambda project_name: project_name, lock=_parent_properties_lock)
+def _fetch_parent_properties(project_name: str):
+    # Kind schemas rarely change between requests, so keep them for a short while.
+    return _get_repository(project_name=project_name).fetch_parent_properties()
+
+
+def _invalidate_parent_properties(project_name: str):
+    # call after writes or deletes, which can add or remove kinds and properties
+    with _parent_properties_lock:
+        _parent_properties_cache.pop(project_name, None)
+
+
+def _fetch_kind_properties(project_name: str, kind: str) -> FrozenSet[str]:
+    # returned as a set since callers only test membership, once per property of every entity
+    return frozenset(_fetch_parent_properties(project_name=project_name).get(kind, []))
+
+
+def _build_key(repository: DatastoreViewerRepository, url_safe_key: str):
+    try:
+        return repository.build_key_by_url_safe_key(url_safe_key=url_safe_key)
+    except ValueError:
+        flask.abort(404)
+
+
+# the encoder is stateless, so a single instance is shared by every view
+_encoder = DataStoreEntityJSONEncoder()
+
 
 class EntityView(flask.views.MethodView):
+    init_every_request = False
+
     def get(self, project_name: str):
         namespace = flask.request.args.get('namespace')
-        repository = DatastoreViewerRepository(
-            project_name=project_name,
-            namespace=namespace,
-        )
+        repository = _get_repository(project_name=project_name, namespace=namespace)
 
         serialized_key = flask.request.args.get('key')
-        key_path = json.loads(base64.b64decode(serialized_key))
-        key = repository.build_key_by_flat_path(key_path=key_path)
+        key = _build_key(repository, serialized_key)
         entity = repository.fetch_entity(key=key)
 
         return flask.jsonify({
@@ -33,37 +89,33 @@ class EntityView(flask.views.MethodView):
 
 
 class ProjectAPIView(flask.views.MethodView):
+    init_every_request = False
+
     def get(self, project_name: str, kind: str):
         per_page = int(flask.request.args.get('perPage', '25'))
         page_number = int(flask.request.args.get('page', '1'))
         order = flask.request.args.get('order', '')
+        # an empty ?cursor= means the first page, which goes through the plain offset query
+        cursor = flask.request.args.get('cursor') or None
+        if cursor is not None:
+            try:
+                base64.urlsafe_b64decode(cursor)
+            except (binascii.Error, ValueError):
+                flask.abort(400)
 
-        encoder = DataStoreEntityJSONEncoder()
-        repository = DatastoreViewerRepository(project_name=project_name)
+        repository = _get_repository(project_name=project_name)
 
-        properties_by_kind = repository.fetch_parent_properties()
         current_kind = kind
-        current_kind_properties = properties_by_kind.get(current_kind, [])
+        current_kind_properties = _fetch_kind_properties(project_name=project_name, kind=current_kind)
 
-        entities, total_count = repository.fetch_entities(
+        entities, total_count, next_cursor = repository.fetch_entities(
             kind=current_kind,
             per_page=per_page,
             page_number=page_number,
             orderBy=order,
+            cursor=cursor,
         )
 
-        entities_array = []
-        for entity in entities:
-            entities_array.append(
-                encoder.encode(
-                    entity=entity,
-                    property_names=current_kind_properties
-                )
-            )
-
-        entities_json = defaultdict(list)
-        entities_json['entityResults'] = entities_array
-
         property_names = set()
         for entity in entities:
             property_names.update(entity.keys())
@@ -77,24 +129,34 @@ class ProjectAPIView(flask.views.MethodView):
                 "index": name in current_kind_properties,
             })
 
+        entities_array = [
+            _encoder.encode(
+                entity=entity,
+                property_names=current_kind_properties
+            )
+            for entity in entities
+        ]
+
         return flask.jsonify({
             'entityResults': entities_array,
-            'pageNumber': page_number,
+            # page_number is not used when paging by cursor
+            'pageNumber': page_number if cursor is None else None,
             'perPage': per_page,
             'totalCount': total_count,
             'properties': entity_properties,
+            'nextCursor': next_cursor.decode('ascii') if next_cursor else None,
         })
 
 
     def delete(self, project_name: str, kind: str):
         data = flask.request.get_json()
-        repository = DatastoreViewerRepository(project_name=project_name)
+        repository = _get_repository(project_name=project_name)
         keys = []
         for key in data["url_safe_key"]:
-            key_path = json.loads(base64.b64decode(key))
-            keys.append(repository.build_key_by_flat_path(key_path=key_path))
+            keys.append(_build_key(repository, key))
 
         repository.delete_multi(keys=keys)
+        _invalidate_parent_properties(project_name=project_name)
 
         return flask.jsonify({
             'deleteResults': data["url_safe_key"]
@@ -102,31 +164,29 @@ class ProjectAPIView(flask.views.MethodView):
 
 
 class EntityAPIView(flask.views.MethodView):
+    init_every_request = False
+
     def get(self, project_name: str, kind: str, url_safe_key: str):
-        encoder = DataStoreEntityJSONEncoder()
-        repository = DatastoreViewerRepository(project_name=project_name)
-        key_path = json.loads(base64.b64decode(url_safe_key))
-        key = repository.build_key_by_flat_path(key_path=key_path)
+        repository = _get_repository(project_name=project_name)
+        key = _build_key(repository, url_safe_key)
         entity = repository.fetch_entity(key=key)
 
-        properties_by_kind = repository.fetch_parent_properties()
         current_kind = kind
-        current_kind_properties = properties_by_kind.get(current_kind, [])
+        current_kind_properties = _fetch_kind_properties(project_name=project_name, kind=current_kind)
 
         return flask.jsonify({
             "entityResult":
-                encoder.encode(
+                _encoder.encode(
                     entity=entity,
                     property_names=current_kind_properties
                 )
         })
 
     def delete(self, project_name: str, kind: str, url_safe_key: str):
-        encoder = DataStoreEntityJSONEncoder()
-        repository = DatastoreViewerRepository(project_name=project_name)
-        key_path = json.loads(base64.b64decode(url_safe_key))
-        key = repository.build_key_by_flat_path(key_path=key_path)
+        repository = _get_repository(project_name=project_name)
+        key = _build_key(repository, url_safe_key)
         repository.delete(key=key)
+        _invalidate_parent_properties(project_name=project_name)
 
         return flask.jsonify({
             "deleteResult": f'{url_safe_key}'
@@ -134,44 +194,41 @@ class EntityAPIView(flask.views.MethodView):
 
 
 class KindAPIView(flask.views.MethodView):
+    init_every_request = False
+
     def get(self, project_name: str):
-        repository = DatastoreViewerRepository(project_name=project_name)
-        properties_by_kind = repository.fetch_parent_properties()
+        properties_by_kind = _fetch_parent_properties(project_name=project_name)
 
-        kinds_json = defaultdict(list)
-        kinds_json['kindResults'] = []
+        kinds_json = {'kindResults': []}
 
-        for kind in properties_by_kind:
-            kind_properties = properties_by_kind.get(kind, [])
+        for kind, kind_properties in properties_by_kind.items():
             kind_dict = {
                 "kind": kind,
-                "indexed_properties": list(map(lambda x: {"property_name": x}, kind_properties))}
+                "indexed_properties": [{"property_name": x} for x in kind_properties]}
             kinds_json['kindResults'].append(kind_dict)
 
         return flask.jsonify(kinds_json)
 
 
 class ProjectListAPIView(flask.views.MethodView):
+    init_every_request = False
+
     def get(self):
-        return flask.jsonify({
-            "projectResult": {
-                "project_name": os.environ.get('GOOGLE_CLOUD_PROJECT', '')
-            }
-        })
+        return flask.jsonify(_PROJECT_LIST_JSON)
 
 
 class SampleDataAPIView(flask.views.MethodView):
+    init_every_request = False
+
     @staticmethod
     def _serialized_doc(doc) -> str:
-        doc_ = {}
-        for k, v in doc.items():
-            doc_[k] = repr(v)
+        doc_ = {k: repr(v) for k, v in doc.items()}
         return json.dumps(doc_, ensure_ascii=True, indent=4)
 
     def post(self):
         from google.cloud import datastore
 
-        client = get_client(project_name=os.environ.get('GOOGLE_CLOUD_PROJECT', ''))
+        client = get_client(project_name=_DEFAULT_PROJECT)
 
         user1 = datastore.Entity(key=client.key("User"))
         user1.update({
@@ -238,8 +295,10 @@ class SampleDataAPIView(flask.views.MethodView):
         embedded["serialized"] = self._serialized_doc(array)
         client.put(array)
 
-        new_kind = datastore.Entity(key=client.key(f"z{datetime.datetime.utcnow().strftime('%Y%m%d-%H%M%S')}"))
+        new_kind = datastore.Entity(key=client.key(f"z{time.strftime('%Y%m%d-%H%M%S', time.gmtime())}"))
         new_kind.update({"value": datetime.datetime.utcnow()})
         client.put(new_kind)
 
+        _invalidate_parent_properties(project_name=_DEFAULT_PROJECT)
+
         return flask.jsonify({"ok": True})
@@ -1,14 +1,43 @@
-import base64
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64
 import datetime
-from typing import List
+from typing import Collection
 from typing import Optional
 
+from google.api_core.datetime_helpers import DatetimeWithNanoseconds
 from google.cloud import datastore
 from google.cloud.datastore import Entity
 
 
+_PROPERTY_TYPES = {
+    str: "string",
+    bool: "boolean",
+    int: "integer",
+    float: "float",
+    datetime.datetime: "timestamp",
+    DatetimeWithNanoseconds: "timestamp",
+    datastore.Key: "key",
+    bytes: "blob",
+    list: "array",
+    set: "array",
+    dict: "embedded",
+    Entity: "embedded",
+    type(None): "null",
+}
+
+# value types that are emitted without any conversion
+_PLAIN_VALUE_TYPES = frozenset(("string", "boolean", "integer", "float", "timestamp", "null"))
+
+
 class DataStoreEntityJSONEncoder:
     def _property_type_checker(self, prop):
+        value_type = _PROPERTY_TYPES.get(type(prop))
+        if value_type is not None:
+            return value_type
+
+        # any other subclasses fall back to isinstance checks
         if isinstance(prop, str):
             return "string"
         elif isinstance(prop, bool):
@@ -40,6 +69,9 @@ class DataStoreEntityJSONEncoder:
         value = property_value
         value_type = self._property_type_checker(property_value)
 
+        if value_type in _PLAIN_VALUE_TYPES:
+            return value_type, value
+
         if value_type == "key":
             value = property_value.path
         elif value_type == "blob":
@@ -48,12 +80,13 @@ class DataStoreEntityJSONEncoder:
             value = [self._array_value_encode(v) for v in value]
         elif value_type == "embedded":
             value = {
-                "properties": DataStoreEntityJSONEncoder().encode(value, None)["entity"]["properties"]
+                "properties": self.encode(value, None)["entity"]["properties"]
             }
 
         return value_type, value
 
-    def encode(self, entity: Entity, property_names: Optional[List[str]]):
+    def encode(self, entity: Entity, property_names: Optional[Collection[str]]):
+        properties = []
         entity_dict = {
             "entity": {
                 "key": {
@@ -62,20 +95,23 @@ class DataStoreEntityJSONEncoder:
                     },
                     "path": entity.key.path if entity and entity.key else None,
                 },
-                "properties": [],
+                "properties": properties,
             },
             "URLSafeKey": entity._serialized_key if hasattr(entity, "_serialized_key") else None
         }
 
-        for prop_name in entity.keys():
-            value_type, value = self._property_encode(entity.get(prop_name))
+        has_property_names = bool(property_names)
+        property_encode = self._property_encode
+
+        for prop_name, prop_value in entity.items():
+            value_type, value = property_encode(prop_value)
 
-            entity_dict['entity']['properties'].append(
+            properties.append(
                 {
                     "property_name": prop_name,
                     "value_type": value_type,
                     "value": value,
-                    "index": prop_name in property_names if property_names else None,
+                    "index": prop_name in property_names if has_property_names else None,
                 },
             )
 
@@ -5,14 +5,19 @@ import flask.views
 
 logger = getLogger(__name__)
 
+_STATIC_DIRECTORY = os.path.join(os.path.dirname(__file__), '..', 'template', 'datastore_viewer', 'static')
+
 
 class DashboardView(flask.views.MethodView):
+    init_every_request = False
+
     def get(self, path=None):
         return flask.render_template('datastore_viewer/index.html')
 
 
 class ServeStaticFileView(flask.views.MethodView):
+    init_every_request = False
+
     def get(self, path):
-        directory = os.path.join(os.path.dirname(__file__), '..', 'template', 'datastore_viewer', 'static')
-        logger.info(f'call ServeStaticFileView, {directory} {path}')
-        return flask.send_from_directory(directory, path)
+        logger.info('call ServeStaticFileView, %s %s', _STATIC_DIRECTORY, path)
+        return flask.send_from_directory(_STATIC_DIRECTORY, path)
@@ -8,6 +8,7 @@ dependencies = [
     'google-cloud-datastore >=1.7.0, >= 1.8.0',
     'Flask >= 1.0.2',
     'flasgger >= 0.9.1',
+    'cachetools >= 3.1.0',
 ]
 
 with open("README.md", "r") as fh:
@@ -42,5 +43,9 @@ setuptools.setup(
     ],
     scripts=scripts,
     install_requires=dependencies,
+    extras_require={
+        'orjson': ['orjson >= 3.0'],
+        'pybase64': ['pybase64 >= 1.0'],
+    },
     include_package_data=True,
 )